@@ -39,6 +39,8 @@
 
 #define MAX_STRING_SIZE 512
 
+static const char *_hexDigits = "0123456789abcdef";
+
 /*
  * coding convention is leading underscore for global data,
  * trailing underscore for function arguments, and no leading
@@ -70,6 +72,8 @@ static bool _logNameEnabled = true;
 static char _outputString[MAX_STRING_SIZE];
 static char _userMessage[MAX_STRING_SIZE];
 static char _timestamp[MAX_STRING_SIZE];
+static time_t _timestampSeconds = 0;
+static unsigned _timestampLength = 0;
 static const char *_timestampFormat = NULL;
 static bool _timestampAddUsec = true;
 static pthread_mutex_t _mutex = PTHREAD_MUTEX_INITIALIZER;
@@ -261,6 +265,8 @@ void trace_setTimestampFormat(const char *format_, bool addUsec_)
 {
   _timestampFormat = format_;
   _timestampAddUsec = addUsec_;
+  // force the cached date/time portion to be reformatted with the new format
+  _timestampSeconds = 0;
 }
 
 /******************************************************************************/
@@ -304,6 +310,8 @@ void trace_outputDump(void *address_,
   const unsigned bytesPerLine = 16;
   unsigned char *bytes = (unsigned char *)address_;
   unsigned short offset = 0;
+  unsigned lineLength = 0;
+  unsigned asciiLength = 0;
 
   // format the user message
   _userMessage[0] = 0;
@@ -318,9 +326,9 @@ void trace_outputDump(void *address_,
   // output the trace
   printLine(_outputString);
 
-  // output our hex dump and ascii equivalent
-  asciiLine[0] = 0;
-  _outputString[0] = 0;
+  // output our hex dump and ascii equivalent, the hex and ascii characters
+  // are stored directly at the current end of each line rather than going
+  // through a sprintf and a strlen for every byte
   for (unsigned i = 0; i < length_; i++)
   {
     // see if we are on a full line boundry
@@ -330,23 +338,27 @@ void trace_outputDump(void *address_,
       if (i > 0)
       {
         /* done with this line, add the asciii data & print it */
-        sprintf(&_outputString[strlen(_outputString)], "  %s\n", asciiLine);
+        asciiLine[asciiLength] = 0;
+        sprintf(&_outputString[lineLength], "  %s\n", asciiLine);
         printLine(_outputString);
         // line  printed, clear them it for next time
-        asciiLine[0] = 0;
-        _outputString[0] = 0;
+        asciiLength = 0;
+        lineLength = 0;
       }
       // format our our offset
-      sprintf(&_outputString[strlen(_outputString)], "  %04x  ", offset);
+      lineLength += sprintf(&_outputString[lineLength], "  %04x  ", offset);
       offset += bytesPerLine;
     }
     // create our line of ascii data, for non-printable ascii characters just use a "."
-    sprintf(&asciiLine[strlen(asciiLine)], "%c", ((isprint(bytes[i]) && (bytes[i] < 128)) ? bytes[i] : '.'));
+    asciiLine[asciiLength++] = ((isprint(bytes[i]) && (bytes[i] < 128)) ? bytes[i] : '.');
     // format our line of hex byte
-    sprintf(&_outputString[strlen(_outputString)], "%02x ", bytes[i]);
+    _outputString[lineLength++] = _hexDigits[bytes[i] >> 4];
+    _outputString[lineLength++] = _hexDigits[bytes[i] & 0x0f];
+    _outputString[lineLength++] = ' ';
   }
   // done, format & print the final line & ascii data
-  sprintf(&_outputString[strlen(_outputString)], "  %*s\n", (int)(((bytesPerLine-strlen(asciiLine))*3)+strlen(asciiLine)), asciiLine);
+  asciiLine[asciiLength] = 0;
+  sprintf(&_outputString[lineLength], "  %*s\n", (int)(((bytesPerLine-asciiLength)*3)+asciiLength), asciiLine);
   printLine(_outputString);
   pthread_mutex_unlock(&_mutex);
 }
@@ -362,21 +374,36 @@ const char *getTimestamp(void)
   struct timeval tv;
   struct tm tm;
 
-  // get timestamp
-  gettimeofday(&tv, NULL);
-  localtime_r(&tv.tv_sec, &tm);
-  if (_timestampFormat == NULL)
+  // the standard format does not show a disabled timestamp, so don't bother
+  // reading the clock, a custom format function always gets a timestamp
+  // because it decides on its own what to display
+  if ((_formatFunction == NULL) && !trace_isTimestampEnabled())
   {
-    strftime(_timestamp, sizeof(_timestamp), "%T", &tm);
+    return ("");
   }
-  else
+
+  // get timestamp
+  gettimeofday(&tv, NULL);
+  // the date/time portion only changes once a second, so only convert and
+  // format it on a new second, otherwise reuse the one we already have
+  if (tv.tv_sec != _timestampSeconds)
   {
-    strftime(_timestamp, sizeof(_timestamp), _timestampFormat, &tm);
+    localtime_r(&tv.tv_sec, &tm);
+    if (_timestampFormat == NULL)
+    {
+      strftime(_timestamp, sizeof(_timestamp), "%T", &tm);
+    }
+    else
+    {
+      strftime(_timestamp, sizeof(_timestamp), _timestampFormat, &tm);
+    }
+    _timestampLength = strlen(_timestamp);
+    _timestampSeconds = tv.tv_sec;
   }
-  // add the microseconds is requested
+  // add the microseconds if requested, right after the date/time portion
   if (_timestampAddUsec)
   {
-    sprintf(_timestamp, "%s.%-6ld", _timestamp, (long)tv.tv_usec);
+    sprintf(&_timestamp[_timestampLength], ".%-6ld", (long)tv.tv_usec);
   }
   return (_timestamp);
 }
@@ -403,7 +430,7 @@ void formatTrace(const char *level_,
     file = file_;
   }
 
-  _outputString[0] = 0;
+  outputString_[0] = 0;
   if (_formatFunction != NULL)
   {
     // custom format function registered, call it
@@ -411,31 +438,33 @@ void formatTrace(const char *level_,
   }
   else
   {
-    // standard output format, see what items are enabled, each item is separated by a '|'
+    // standard output format, see what items are enabled, each item is separated by a '|',
+    // keep track of where the string ends so each item is appended without rescanning it
+    int length = 0;
 
     // add the prefix if enabled, this is usually the program name
     if (trace_isLogNameEnabled())
     {
-      sprintf(&_outputString[strlen(_outputString)], "%s | ", trace_getLogName());
+      length += sprintf(&outputString_[length], "%s | ", trace_getLogName());
     }
 
     // add the level
-    sprintf(&_outputString[strlen(_outputString)], "%-*s | ", _maxLevelLength, level_);
+    length += sprintf(&outputString_[length], "%-*s | ", _maxLevelLength, level_);
 
     // add any timestamp if enabled
     if (trace_isTimestampEnabled())
     {
-      sprintf(&_outputString[strlen(_outputString)], "%s | ", timestamp_);
+      length += sprintf(&outputString_[length], "%s | ", timestamp_);
     }
 
     // add any location if enabled
     if (trace_isLocationEnabled())
     {
-      sprintf(&_outputString[strlen(_outputString)], "%s(%s):%d | ", file, function_, line_);
+      length += sprintf(&outputString_[length], "%s(%s):%d | ", file, function_, line_);
     }
 
     // add the user message
-    sprintf(&_outputString[strlen(_outputString)], "%s\n", userMessage_);
+    sprintf(&outputString_[length], "%s\n", userMessage_);
   }
 
 }
@@ -0,0 +1,102 @@
+#!/usr/bin/python
+
+#################################################################################
+#
+# Copyright (c) 2009, Ron Iovine, All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#     * Redistributions of source code must retain the above copyright
+#       notice, this list of conditions and the following disclaimer.
+#     * Redistributions in binary form must reproduce the above copyright
+#       notice, this list of conditions and the following disclaimer in the
+#       documentation and/or other materials provided with the distribution.
+#     * Neither the name of Ron Iovine nor the names of its contributors
+#       may be used to endorse or promote products derived from this software
+#       without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY Ron Iovine ''AS IS'' AND ANY EXPRESS OR
+# IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES
+# OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED.
+# IN NO EVENT SHALL Ron Iovine BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
+# SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR
+# BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER
+# IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+#
+#################################################################################
+
+"""
+Private helpers shared by the Python pshell modules
+
+This module is not part of any user API, it holds the file system handling
+that is common to PshellServer, PshellControl, and the pshell client, much
+like the C file PshellCommon.h does for the C server and client.
+"""
+
+import os
+import fcntl
+
+#################################################################################
+#################################################################################
+def _createFileSystemPath(path_):
+  # the directory is shared by every user's servers and clients, the makedirs
+  # mode is masked by the umask, so the permissions must be set explicitly
+  if not os.path.isdir(path_):
+    try:
+      os.makedirs(path_)
+      os.chmod(path_, 0o777)
+    except OSError:
+      None
+
+#################################################################################
+#################################################################################
+def _openFirstFile(files_):
+  # return the first candidate file that can be opened, or None if none of
+  # them can be, a missing file or a directory just fails the open, so there
+  # is no need to stat each candidate with isfile before opening it
+  for file in files_:
+    if (len(file) > 0):
+      try:
+        return (open(file, 'r'))
+      except IOError:
+        None
+  return (None)
+
+#################################################################################
+#################################################################################
+def _cleanupLockFiles(path_, lockFileExtension_, getSocketFile_):
+  # remove the lockfile, along with any socket file named by getSocketFile_,
+  # of every process that no longer holds the flock on it, i.e. one that exited
+  # without cleaning up, and return the lockfiles that are still held, a raw
+  # descriptor is all the flock needs, and it is always closed again
+  _createFileSystemPath(path_)
+  heldLockFiles = []
+  lockFiles = [file for file in os.listdir(path_) if file.endswith(lockFileExtension_)]
+  lockFiles.sort()
+  for file in lockFiles:
+    try:
+      fd = os.open(path_+file, os.O_RDONLY)
+    except OSError:
+      continue
+    try:
+      fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+      # we got the lock, delete any socket file and the lockfile itself
+      socketFile = getSocketFile_(file)
+      if (socketFile != None):
+        try:
+          os.unlink(path_+socketFile)
+        except OSError:
+          None
+      try:
+        os.unlink(path_+file)
+      except OSError:
+        None
+    except IOError:
+      # lockfile is held by a running process, leave it alone
+      heldLockFiles.append(file)
+    finally:
+      os.close(fd)
+  return (heldLockFiles)
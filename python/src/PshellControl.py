@@ -121,11 +121,10 @@ import time
 import select
 import socket
 import struct
-import random
 import fcntl
-import fnmatch
 from collections import OrderedDict
 from collections import namedtuple
+import PshellCommon
 
 #################################################################################
 #
@@ -547,6 +546,12 @@ _gLockFileExtension = ".lock"
 _PSHELL_CONFIG_DIR = "/etc/pshell/config"
 _PSHELL_CONFIG_FILE = "pshell-control.conf"
 
+# unix control client source addresses are named <server>-control<id>, the
+# id is a counter that is seeded from os.urandom so concurrent clients start
+# probing at different ids, and walks the id space on an address collision
+_MAX_UNIX_CLIENTS = 1000
+_gUnixSourceId = struct.unpack("I", os.urandom(4))[0] % _MAX_UNIX_CLIENTS
+
 # these are the valid types we recognize in the msgType field of the pshellMsg structure,
 # that structure is the message passed between the pshell client and server, these values
 # must match their corresponding #define definitions in the C file PshellCommon.h
@@ -607,7 +612,7 @@ def _connectServer(controlName_, remoteServer_, port_, defaultTimeout_):
       # UNIX domain socket
       socketFd = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
       # bind our source socket so we can get replies
-      sourceAddress = _gUnixSocketPath+remoteServer_+"-control"+str(random.randrange(1000))
+      sourceAddress = _getUnixSourceAddress(remoteServer_)
       lockFile = sourceAddress+_gLockFileExtension
       bound = False
       while (not bound):
@@ -617,7 +622,7 @@ def _connectServer(controlName_, remoteServer_, port_, defaultTimeout_):
           socketFd.bind(sourceAddress)
           bound = True
         except Exception as e:
-          sourceAddress = _gUnixSocketPath+remoteServer_+"-control"+str(random.randrange(1000))
+          sourceAddress = _getUnixSourceAddress(remoteServer_)
           lockFile = sourceAddress+_gLockFileExtension
       _gPshellControl.append({"socket":socketFd,
                               "timeout":defaultTimeout_,
@@ -664,9 +669,17 @@ def _connectServer(controlName_, remoteServer_, port_, defaultTimeout_):
                                                        ("payload","")])})
       return True
   else:
-    _printWarning("Control name: '{}' already exists, must use unique control name".format(controlName_))
+    _printWarning("Control name: '%s' already exists, must use unique control name", controlName_)
     return False
 
+#################################################################################
+#################################################################################
+def _getUnixSourceAddress(remoteServer_):
+  global _gUnixSocketPath
+  global _gUnixSourceId
+  _gUnixSourceId = (_gUnixSourceId + 1) % _MAX_UNIX_CLIENTS
+  return (_gUnixSocketPath+remoteServer_+"-control"+str(_gUnixSourceId))
+
 #################################################################################
 #################################################################################
 def _disconnectServer(controlName_):
@@ -796,7 +809,7 @@ def _addMulticast(command_, controlList_):
       if sid != _INVALID_SID:
         _addMulticastSid(command_, sid)
       else:
-        _printWarning("Control name: '{}' not found".format(controlName))
+        _printWarning("Control name: '%s' not found", controlName)
 
 #################################################################################
 #################################################################################
@@ -846,7 +859,7 @@ def _sendMulticast(command_):
         control["dataNeeded"] = False
         _sendCommand(control, _gMsgTypes["controlCommand"], command_, NO_WAIT)
   if not keywordFound:
-    _printError("Multicast command: '%s', not found" % command)
+    _printError("Multicast command: '%s', not found", command)
 
 #################################################################################
 #################################################################################
@@ -939,9 +952,16 @@ def _sendCommand(control_, commandType_, command_, timeout_):
     if (sentSize == 0):
       retCode = SOCKET_SEND_FAILURE
     elif (timeout_ > NO_WAIT):
+      # compute our deadline once so that tossing any stale responses
+      # below does not restart the full timeout on every pass
+      deadline = time.time() + float(timeout_)/float(1000.0)
       while (True):
+        remaining = deadline - time.time()
+        if (remaining <= 0):
+          retCode = SOCKET_TIMEOUT
+          break
         try:
-          inputready, outputready, exceptready = select.select([control_["socket"]], [], [], float(timeout_)/float(1000.0))
+          inputready, outputready, exceptready = select.select([control_["socket"]], [], [], remaining)
         except:
           inputready = []
         if (len(inputready) > 0):
@@ -954,7 +974,7 @@ def _sendCommand(control_, commandType_, command_, timeout_):
             # our current expected response, when we detect that condition, we read the
             # socket until we either find the correct response or timeout, we toss any previous
             # unmatched responses
-            _printWarning("Received seqNum: %d, does not match sent seqNum: %d" % (control_["pshellMsg"]["seqNum"], seqNum))
+            _printWarning("Received seqNum: %d, does not match sent seqNum: %d", control_["pshellMsg"]["seqNum"], seqNum)
           else:
             retCode = control_["pshellMsg"]["msgType"]
             break
@@ -970,9 +990,9 @@ def _sendCommand(control_, commandType_, command_, timeout_):
   if ((_gSupressInvalidArgCountMessage == True) and (retCode == COMMAND_INVALID_ARG_COUNT)):
     retCode = COMMAND_SUCCESS
   elif ((len(control_["pshellMsg"]["payload"]) > 0) and (retCode > COMMAND_SUCCESS) and (retCode < SOCKET_SEND_FAILURE)):
-    _printError("Remote pshell command: '%s', server: %s, %s" % (command_, control_["remoteServer"], _getResponseString(retCode)))
+    _printError("Remote pshell command: '%s', server: %s, %s", command_, control_["remoteServer"], _getResponseString(retCode))
   elif ((retCode != COMMAND_SUCCESS) and (retCode != _gMsgTypes["commandComplete"])):
-    _printError("Remote pshell command: '%s', server: %s, %s" % (command_, control_["remoteServer"], _getResponseString(retCode)))
+    _printError("Remote pshell command: '%s', server: %s, %s", command_, control_["remoteServer"], _getResponseString(retCode))
   else:
     retCode = COMMAND_SUCCESS
   return (retCode)
@@ -991,28 +1011,13 @@ def _getResponseString(retCode):
 def _cleanupUnixResources():
   global _gUnixSocketPath
   global _gLockFileExtension
-  if not os.path.isdir(_gUnixSocketPath):
-    os.system("mkdir %s" % _gFileSystemPath)
-    os.system("chmod 777 %s" % _gFileSystemPath)
-  lockFiles = fnmatch.filter(os.listdir(_gUnixSocketPath), "*"+_gLockFileExtension)
-  for file in lockFiles:
-    try:
-      fd = open(_gUnixSocketPath+file, "r")
-      try:
-        fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
-        # we got the lock, delete any socket file and lock file and don't print anything
-        try:
-          os.unlink(_gUnixSocketPath+file.split(".")[0])
-        except:
-          None
-        try:
-          os.unlink(_gUnixSocketPath+file)
-        except:
-          None
-      except:
-        None
-    except:
-      None
+  PshellCommon._cleanupLockFiles(_gUnixSocketPath, _gLockFileExtension, _getUnixSocketFile)
+
+#################################################################################
+#################################################################################
+def _getUnixSocketFile(lockFile_):
+  # the socket file of a control client is its lockfile without the extension
+  return (lockFile_.split(".")[0])
 
 #################################################################################
 #################################################################################
@@ -1040,13 +1045,8 @@ def _loadConfigFile(controlName_, remoteServer_, port_, defaultTimeout_):
     configFile1 = configPath+"/"+_PSHELL_CONFIG_FILE
   configFile2 = _PSHELL_CONFIG_DIR+"/"+_PSHELL_CONFIG_FILE
   configFile3 = os.getcwd()+"/"+_PSHELL_CONFIG_FILE
-  if (os.path.isfile(configFile1)):
-    file = open(configFile1, 'r')
-  elif (os.path.isfile(configFile2)):
-    file = open(configFile2, 'r')
-  elif (os.path.isfile(configFile3)):
-    file = open(configFile3, 'r')
-  else:
+  file = PshellCommon._openFirstFile([configFile1, configFile2, configFile3])
+  if (file == None):
     return (remoteServer_, port_, defaultTimeout_)
   # found a config file, process it
   isUnix = False
@@ -1057,15 +1057,17 @@ def _loadConfigFile(controlName_, remoteServer_, port_, defaultTimeout_):
       if (len(option) == 2):
         control = option[0].split(".")
         if ((len(control) == 2) and (controlName_ == control[0])):
-          if (control[1].lower() == "udp"):
+          # lowercase the option name once rather than once per comparison
+          key = control[1].lower()
+          if (key == "udp"):
             remoteServer_ = option[1].strip()
-          elif (control[1].lower() == "unix"):
+          elif (key == "unix"):
             remoteServer_ = option[1].strip()
             port_ = "unix"
             isUnix = True
-          elif (control[1].lower() == "port"):
+          elif (key == "port"):
             port_ = option[1].strip()
-          elif (control[1].lower() == "timeout"):
+          elif (key == "timeout"):
             if (option[1].lower().strip() == "none"):
               defaultTimeout_ = 0
             else:
@@ -1092,21 +1094,24 @@ def _setLogFunction(function_):
 
 #################################################################################
 #################################################################################
-def _printError(message_):
+def _printError(message_, *args_):
+  # any arguments are only formatted into the message if it is actually logged
   if _gLogLevel >= LOG_LEVEL_ERROR:
-    _printLog("PSHELL_ERROR: {}".format(message_))
+    _printLog("PSHELL_ERROR: {}".format(message_ % args_ if args_ else message_))
 
 #################################################################################
 #################################################################################
-def _printWarning(message_):
+def _printWarning(message_, *args_):
+  # any arguments are only formatted into the message if it is actually logged
   if _gLogLevel >= LOG_LEVEL_WARNING:
-    _printLog("PSHELL_WARNING: {}".format(message_))
+    _printLog("PSHELL_WARNING: {}".format(message_ % args_ if args_ else message_))
 
 #################################################################################
 #################################################################################
-def _printInfo(message_):
+def _printInfo(message_, *args_):
+  # any arguments are only formatted into the message if it is actually logged
   if _gLogLevel >= LOG_LEVEL_INFO:
-    _printLog("PSHELL_INFO: {}".format(message_))
+    _printLog("PSHELL_INFO: {}".format(message_ % args_ if args_ else message_))
 
 #################################################################################
 #################################################################################
@@ -164,13 +164,13 @@ import time
 import select
 import socket
 import struct
-import random
+import re
 import thread
 import fcntl
-import fnmatch
 from collections import OrderedDict
 from collections import namedtuple
 import PshellReadline
+import PshellCommon
 
 #################################################################################
 #
@@ -760,10 +760,20 @@ def getFloat(string):
 #
 #################################################################################
 
-_gCommandHelp = ('?', '-h', '--h', '-help', '--help')
+_gCommandHelp = frozenset(('?', '-h', '--h', '-help', '--help'))
 _gListHelp = ('?', 'help')
 _gCommandList = []
+# the same command entries keyed by name for exact match lookups
+_gCommandDict = {}
+# character trie of the command names for abbreviation lookups, each node keeps
+# its child nodes keyed by character, the number of commands whose name starts
+# with the prefix leading to that node, and the last such command added, which
+# is the one and only match whenever that count is 1
+_gCommandTrie = {"children":{}, "numCommands":0, "command":None}
 _gMaxLength = len("history")
+# row format for the command list, the name column width is substituted in
+# whenever _gMaxLength grows so each row is a plain 2 argument format
+_gCommandRowFormat = "%-" + str(_gMaxLength) + "s  -  %s\n"
 
 _gServerVersion = "1"
 _gServerName = None
@@ -786,6 +796,7 @@ _gLockFileExtension = ".lock"
 _gUnixLockFileId = "unix"+_gLockFileExtension
 _gLockFd = None
 _gRunning = False
+_gTabCompletionsAdded = False
 _gCommandDispatched = False
 _gCommandInteractive = True
 
@@ -816,6 +827,11 @@ _gMsgTypes = {"commandSuccess": 0,
               "queryPrompt":11,
               "controlCommand":12}
 
+# message types referenced on every command dispatch and every flush, resolve
+# them once here rather than doing a dictionary lookup on each packet
+_gMsgTypeCommandComplete = _gMsgTypes["commandComplete"]
+_gMsgTypeControlCommand = _gMsgTypes["controlCommand"]
+
 # fields of PshellMsg, we use this definition to unpack the received PshellMsg
 # response from the server into a corresponding OrderedDict in the PshellControl
 # entry
@@ -826,9 +842,26 @@ _PshellMsg = namedtuple('PshellMsg', 'msgType respNeeded dataNeeded pad seqNum p
 # structure that can be transmitted over-the-wire via a socket
 _gPshellMsgHeaderFormat = "4BI"
 
+# the header layout never changes, so compile it once, the variable length
+# payload is just the remainder of the datagram following the header
+_gPshellMsgHeader = struct.Struct(_gPshellMsgHeaderFormat)
+_gPshellMsgHeaderSize = _gPshellMsgHeader.size
+
 # default PshellMsg payload length, used to receive responses
 _gPshellMsgPayloadLength = 1024*64
 
+# printf output for a UDP/UNIX client is collected here as a list of chunks
+# and only joined onto the PshellMsg payload when a reply is sent, appending
+# each message to the payload string itself copies the whole string every time
+_gPayloadChunks = []
+_gPayloadChunksLength = 0
+
+# dispatch table for the query message types, indexed directly by the msgType
+# field of a received PshellMsg, the msgType is an unsigned byte so the table
+# covers all possible values, any non-query type has a handler of None, the
+# table is populated in _startServer
+_gQueryHandlers = [None]*256
+
 _gPshellMsg =  OrderedDict([("msgType",0),
                             ("respNeeded",True),
                             ("dataNeeded",True),
@@ -848,6 +881,14 @@ _gHelpLength = 1
 _gWheelPos = 0
 _gWheel = "|/-\\"
 
+# the wheel and march keep-alives only send a datagram to the client if this
+# many seconds have elapsed since the last one was sent, or if this many bytes
+# of frames have accumulated, otherwise the frames are held in the reply
+# buffer and go out with the next keep-alive, flush, or the command completion
+_gKeepAliveInterval = 0.1
+_gKeepAliveMaxBatch = 1024
+_gLastKeepAlive = 0
+
 _gQuitLocal = False
 _gQuitTcp = False
 _gTcpTimeout = 10  # minutes
@@ -865,6 +906,31 @@ _gLogFunction = None
 
 _MAX_BIND_ATTEMPTS = 1000
 
+# precompiled patterns for the address validation functions, each address is
+# checked with a single match instead of splitting it and converting every
+# octet or byte individually
+_gIpv4AddrPattern = re.compile(r"^(?:(?:25[0-5]|2[0-4]\d|1\d\d|[1-9]?\d)\.){3}(?:25[0-5]|2[0-4]\d|1\d\d|[1-9]?\d)$")
+_gIpv4AddrWithNetmaskPattern = re.compile(r"^(?:(?:25[0-5]|2[0-4]\d|1\d\d|[1-9]?\d)\.){3}(?:25[0-5]|2[0-4]\d|1\d\d|[1-9]?\d)/(?:3[0-2]|[12]?\d)$")
+_gMacAddrPattern = re.compile(r"^(?:[0-9a-fA-F]{2}:){5}[0-9a-fA-F]{2}$")
+
+# precompiled patterns for the numeric validation functions, these accept exactly
+# the strings the corresponding 'int' conversion accepts (optional surrounding
+# whitespace and an optional sign, which python 2 also lets whitespace follow),
+# without having to raise and catch a ValueError for each string that is not
+# valid, the unprefixed hex pattern allows an uppercase "0X" since only a
+# lowercase "0x" is rejected when no prefix is requested
+_gDecPattern = re.compile(r"^\s*(?:[-+]\s*)?\d+\s*$")
+_gHexPrefixPattern = re.compile(r"^0[xX][0-9a-fA-F]+\s*$")
+_gHexNoPrefixPattern = re.compile(r"^\s*(?:[-+]\s*)?(?:0X)?[0-9a-fA-F]+\s*$")
+
+# floating point format accepted by isFloat, an optional minus sign and digits
+# with exactly one decimal point, this matches the C pshell_isFloat function,
+# and any leading and trailing whitespace is ignored
+_gFloatPattern = re.compile(r"^\s*-?(?:\d+\.\d*|\.\d+)\s*$")
+
+# (lowercase) strings that getBool interprets as True
+_gTrueStrings = frozenset(("true", "yes", "on"))
+
 #################################################################################
 #
 # global "private" functions
@@ -874,7 +940,8 @@ _MAX_BIND_ATTEMPTS = 1000
 #################################################################################
 #################################################################################
 def _tokenize(string_, delimiter_):
-  return (len(str(string_).split(delimiter_)), str(string_).split(delimiter_))
+  tokens = str(string_).split(delimiter_)
+  return (len(tokens), tokens)
 
 #################################################################################
 #################################################################################
@@ -889,7 +956,7 @@ def _isEqual(string1_, string2_):
 #################################################################################
 #################################################################################
 def _isEqualNoCase(string1_, string2_):
-  return (isEqual(str(string1_).lower(), str(string2_).lower()))
+  return (_isEqual(str(string1_).lower(), str(string2_).lower()))
 
 #################################################################################
 #################################################################################
@@ -899,7 +966,7 @@ def _isSubString(string1_, string2_, minMatchLength_):
 #################################################################################
 #################################################################################
 def _isSubStringNoCase(string1_, string2_, minMatchLength_ = 0):
-  return (_isSubString(str(string1_).lower(), str(string2_).lower(), minMatchLength))
+  return (_isSubString(str(string1_).lower(), str(string2_).lower(), minMatchLength_))
 
 #################################################################################
 #################################################################################
@@ -918,39 +985,38 @@ def _getOption(arg_):
 #################################################################################
 #################################################################################
 def _isFloat(string_):
-  split = str(string_).split(".")
-  if len(split) != 2:
-    return False
-  else:
-    return split[1][0] != "-" and isDec(split[0]) and isDec(split[1])
+  global _gFloatPattern
+  return (_gFloatPattern.match(str(string_)) != None)
 
 #################################################################################
 #################################################################################
 def _isDec(string_):
-  try:
-    int(str(string_), 10)
-    return True
-  except ValueError:
-    return False
+  global _gDecPattern
+  return (_gDecPattern.match(str(string_)) != None)
 
 #################################################################################
 #################################################################################
 def _isHex(string_, needHexPrefix_):
-  string = str(string_)
+  global _gHexPrefixPattern
+  global _gHexNoPrefixPattern
+  if needHexPrefix_:
+    return (_gHexPrefixPattern.match(str(string_)) != None)
+  else:
+    return (_gHexNoPrefixPattern.match(str(string_)) != None)
+
+#################################################################################
+#################################################################################
+def _isValidHexPrefix(string_, needHexPrefix_):
   if needHexPrefix_:
-    # hex prefix requested, make sure they provided one
-    if len(string) < 3 or string[0:2].lower() != "0x":
-      return False
+    # hex prefix requested, make sure they provided one, test the prefix in
+    # place rather than slicing and lowercasing a copy of it
+    return (len(string_) >= 3 and string_.startswith(("0x", "0X")))
   else:
     # no prefix requested, make sure the did not provide one, since the
-    # following 'int' call for base 16 will work either way
-    if "0x" in string:
-      return False
-  try:
-    int(string, 16)
-    return True
-  except ValueError:
-    return False
+    # 'int' call for base 16 will work either way, note this stays a
+    # containment test rather than startswith because 'int' also accepts
+    # a prefix behind a sign or leading whitespace, i.e. "-0x1"
+    return ("0x" not in string_)
 
 #################################################################################
 #################################################################################
@@ -960,7 +1026,12 @@ def _isAlpha(string_):
 #################################################################################
 #################################################################################
 def _isNumeric(string_, needHexPrefix_):
-  return _isDec(string_) or _isHex(string_, needHexPrefix_)
+  # every valid decimal string is also a valid unprefixed hex string, so
+  # without a prefix a single hex match covers both cases
+  if needHexPrefix_:
+    return (_isDec(string_) or _isHex(string_, True))
+  else:
+    return (_isHex(string_, False))
 
 #################################################################################
 #################################################################################
@@ -970,70 +1041,46 @@ def _isAlphaNumeric(string_):
 #################################################################################
 #################################################################################
 def _isIpv4Addr(string_):
-  addr = string_.split(".")
-  return (len(addr) == 4 and
-          isDec(addr[0]) and
-          getInt(addr[0]) >= 0 and
-          getInt(addr[0]) <= 255 and
-          isDec(addr[1]) and
-          getInt(addr[1]) >= 0 and
-          getInt(addr[1]) <= 255 and
-          isDec(addr[2]) and
-          getInt(addr[2]) >= 0 and
-          getInt(addr[2]) <= 255 and
-          isDec(addr[3]) and
-          getInt(addr[3]) >= 0 and
-          getInt(addr[3]) <= 255)
+  global _gIpv4AddrPattern
+  return (_gIpv4AddrPattern.match(str(string_)) != None)
 
 #################################################################################
 #################################################################################
 def _isIpv4AddrWithNetmask(string_):
-  addr = string_.split("/")
-  return (len(addr) == 2 and
-          isIpv4Addr(addr[0]) and
-          isDec(addr[1]) and
-          getInt(addr[1]) >= 0 and
-          getInt(addr[1]) <= 32)
+  global _gIpv4AddrWithNetmaskPattern
+  return (_gIpv4AddrWithNetmaskPattern.match(str(string_)) != None)
 
 #################################################################################
 #################################################################################
 def _isMacAddr(string_):
-  addr = string_.split(":")
-  return (len(addr) == 6 and
-          isHex(addr[0], False) and len(addr[0]) == 2 and
-          isHex(addr[1], False) and len(addr[1]) == 2 and
-          isHex(addr[2], False) and len(addr[2]) == 2 and
-          isHex(addr[3], False) and len(addr[3]) == 2 and
-          isHex(addr[4], False) and len(addr[4]) == 2 and
-          isHex(addr[5], False) and len(addr[5]) == 2)
+  global _gMacAddrPattern
+  return (_gMacAddrPattern.match(str(string_)) != None)
 
 #################################################################################
 #################################################################################
 def _getBool(string_):
-  string = str(string_)
-  return ((string.lower() == "true") or
-          (string.lower() == "yes") or
-          (string.lower() == "on"))
+  global _gTrueStrings
+  return (str(string_).lower() in _gTrueStrings)
 
 #################################################################################
 #################################################################################
 def _getInt(string_, radix_, needHexPrefix_):
+  # convert directly rather than validating the format first and then
+  # converting, so each radix that is tried only parses the string once
   string = str(string_)
-  if radix_ == RADIX_ANY:
-    if _isDec(string):
+  if ((radix_ == RADIX_ANY) or (radix_ == RADIX_DEC)):
+    try:
       return (int(string, 10))
-    elif _isHex(string, needHexPrefix_):
+    except ValueError:
+      None
+  if (((radix_ == RADIX_ANY) or (radix_ == RADIX_HEX)) and
+      _isValidHexPrefix(string, needHexPrefix_)):
+    try:
       return (int(string, 16))
-    else:
-      _printError("Could not extract numeric value from string: '%s', consider checking format with PshellServer.isNumeric()" % string)
-      return (0)
-  elif radix_ == RADIX_DEC and _isDec(string):
-    return (int(string, 10))
-  elif radix_ == RADIX_HEX and _isHex(string, needHexPrefix_):
-    return (int(string, 16))
-  else:
-    _printError("Could not extract numeric value from string: '%s', consider checking format with PshellServer.isNumeric()" % string)
-    return (0)
+    except ValueError:
+      None
+  _printError("Could not extract numeric value from string: '%s', consider checking format with PshellServer.isNumeric()", string)
+  return (0)
 
 #################################################################################
 #################################################################################
@@ -1042,7 +1089,7 @@ def _getFloat(string_):
   if _isFloat(string):
     return (float(string))
   else:
-    _printError("Could not extract floating point value from string: '%s', consider checking format with PshellServer.isFloat()" % string)
+    _printError("Could not extract floating point value from string: '%s', consider checking format with PshellServer.isFloat()", string)
     return (0.0)
 
 #################################################################################
@@ -1056,9 +1103,13 @@ def _addCommand(function_,
                 showUsage_,
                 prepend_ = False):
   global _gCommandList
+  global _gCommandDict
   global _gMaxLength
+  global _gCommandRowFormat
   global _gServerType
   global _gPshellClient
+  global _gTabCompletionsAdded
+  global _gCommandTrie
 
   # see if we have a NULL command name
   if ((command_ == None) or (len(command_) == 0)):
@@ -1067,36 +1118,35 @@ def _addCommand(function_,
 
   # see if we have a NULL description
   if ((description_ == None) or (len(description_) == 0)):
-    _printError("NULL description, command: '%s' not added" % command_)
+    _printError("NULL description, command: '%s' not added", command_)
     return
 
   # see if we have a NULL function
   if (function_ == None):
-    _printError("NULL function, command: '%s' not added" % command_)
+    _printError("NULL function, command: '%s' not added", command_)
     return
 
   # if they provided no usage for a function with arguments
   if (((maxArgs_ > 0) or (minArgs_ > 0)) and (command_ != "quit") and (command_ != "history") and ((usage_ == None) or (len(usage_) == 0))):
-    _printError("NULL usage for command that takes arguments, command: '%s' not added" % command_)
+    _printError("NULL usage for command that takes arguments, command: '%s' not added", command_)
     return
 
   # see if their minArgs is greater than their maxArgs, we ignore if maxArgs is 0
   # because that is the default value and we will set maxArgs to minArgs if that
   # case later on in this function
   if ((minArgs_ > maxArgs_) and (maxArgs_ > 0)):
-    _printError("minArgs: %d is greater than maxArgs: %d, command: '%s' not added" % (minArgs_, maxArgs_, command_))
+    _printError("minArgs: %d is greater than maxArgs: %d, command: '%s' not added", minArgs_, maxArgs_, command_)
     return
 
   # see if it is a duplicate command
-  for command in _gCommandList:
-    if (command["name"] == command_):
-      # command name already exists, don't add it again
-      _printError("Command: %s already exists, not adding command" % command_)
-      return
+  if (command_ in _gCommandDict):
+    # command name already exists, don't add it again
+    _printError("Command: %s already exists, not adding command", command_)
+    return
 
   if len(command_.split()) > 1:
     # we do not allow any commands with whitespace, single keyword commands only
-    _printError("Whitespace found, command: '%s' not added" % command_)
+    _printError("Whitespace found, command: '%s' not added", command_)
     return
 
   # everything ok, good to add command
@@ -1109,25 +1159,36 @@ def _addCommand(function_,
 
   if (len(command_) > _gMaxLength):
     _gMaxLength = len(command_)
+    _gCommandRowFormat = "%-" + str(_gMaxLength) + "s  -  %s\n"
+
+  command = {"function":function_,
+             "name":command_,
+             "description":description_,
+             "usage":usage_,
+             "minArgs":minArgs_,
+             "maxArgs":maxArgs,
+             "showUsage":showUsage_,
+             "length":len(command_)}
 
   if (prepend_ == True):
-    _gCommandList.insert(0, {"function":function_,
-                             "name":command_,
-                             "description":description_,
-                             "usage":usage_,
-                             "minArgs":minArgs_,
-                             "maxArgs":maxArgs,
-                             "showUsage":showUsage_,
-                             "length":len(command_)})
+    _gCommandList.insert(0, command)
   else:
-    _gCommandList.append({"function":function_,
-                          "name":command_,
-                          "description":description_,
-                          "usage":usage_,
-                          "minArgs":minArgs_,
-                          "maxArgs":maxArgs,
-                          "showUsage":showUsage_,
-                          "length":len(command_)})
+    _gCommandList.append(command)
+  _gCommandDict[command_] = command
+
+  # add the name to the abbreviation trie, counting it at every prefix node
+  node = _gCommandTrie
+  for char in command_:
+    if (char not in node["children"]):
+      node["children"][char] = {"children":{}, "numCommands":0, "command":None}
+    node = node["children"][char]
+    node["numCommands"] += 1
+    node["command"] = command
+
+  # if the server is already up and running, make the command TAB completable
+  # right away, otherwise it is picked up by the catch-up in _addTabCompletions
+  if (_gTabCompletionsAdded == True):
+    PshellReadline.addTabCompletion(command_)
 
 #################################################################################
 #################################################################################
@@ -1141,6 +1202,7 @@ def _startServer(serverName_, serverType_, serverMode_, hostnameOrIpAddr_, port_
   global _gPrompt
   _cleanupFileSystemResources()
   if (_gRunning == False):
+    _initQueryHandlers()
     _gServerName = serverName_
     _gServerType = serverType_
     _gServerMode = serverMode_
@@ -1157,7 +1219,21 @@ def _startServer(serverName_, serverType_, serverMode_, hostnameOrIpAddr_, port_
       # spawn thread
       thread.start_new_thread(_serverThread, ())
   else:
-    _printError("PSHELL server: %s is already running" % serverName_)
+    _printError("PSHELL server: %s is already running", serverName_)
+
+#################################################################################
+#################################################################################
+def _initQueryHandlers():
+  global _gQueryHandlers
+  global _gMsgTypes
+  _gQueryHandlers[_gMsgTypes["queryVersion"]] = _processQueryVersion
+  _gQueryHandlers[_gMsgTypes["queryPayloadSize"]] = _processQueryPayloadSize
+  _gQueryHandlers[_gMsgTypes["queryName"]] = _processQueryName
+  _gQueryHandlers[_gMsgTypes["queryTitle"]] = _processQueryTitle
+  _gQueryHandlers[_gMsgTypes["queryBanner"]] = _processQueryBanner
+  _gQueryHandlers[_gMsgTypes["queryPrompt"]] = _processQueryPrompt
+  _gQueryHandlers[_gMsgTypes["queryCommands1"]] = _processQueryCommands1
+  _gQueryHandlers[_gMsgTypes["queryCommands2"]] = _processQueryCommands2
 
 #################################################################################
 #################################################################################
@@ -1169,32 +1245,45 @@ def _serverThread():
 def _cleanupFileSystemResources():
   global _gFileSystemPath
   global _gLockFileExtension
+  PshellCommon._cleanupLockFiles(_gFileSystemPath, _gLockFileExtension, _getUnixSocketFile)
+
+#################################################################################
+#################################################################################
+def _getUnixSocketFile(lockFile_):
   global _gUnixLockFileId
-  if not os.path.isdir(_gFileSystemPath):
-    os.system("mkdir %s" % _gFileSystemPath)
-    os.system("chmod 777 %s" % _gFileSystemPath)
-  lockFiles = fnmatch.filter(os.listdir(_gFileSystemPath), "*"+_gLockFileExtension)
-  for file in lockFiles:
+  # only a UNIX server has a socket file, named by the start of its lockfile
+  if _gUnixLockFileId in lockFile_:
+    return (lockFile_.split("-")[0])
+  else:
+    return (None)
+
+#################################################################################
+#################################################################################
+def _acquireLockFile(lockFile_):
+  # open the lockfile with a single raw open call, no buffered file object
+  # needed, the lock itself must stay an flock since that is how all the other
+  # pshell components detect if the owning process of a lockfile is still alive
+  fd = os.open(lockFile_, os.O_CREAT | os.O_WRONLY, 0o666)
+  try:
+    fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+  except:
+    os.close(fd)
+    raise
+  return (fd)
+
+#################################################################################
+#################################################################################
+def _releaseLockFile():
+  global _gLockFd
+  # closing the fd drops its flock, this must be done before the same lockfile
+  # is locked again, i.e. when the TCP server rebinds for its next session,
+  # because a second open of the file cannot get a lock the first still holds
+  if (_gLockFd != None):
     try:
-      fd = open(_gFileSystemPath+file, "r")
-      try:
-        fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
-        # we got the lock, delete any socket file and lock file and don't print anything
-        try:
-          # unix temp socket file
-          if _gUnixLockFileId in file:
-            os.unlink(_gFileSystemPath+file.split("-")[0])
-        except:
-          None
-        try:
-          # lockfile
-          os.unlink(_gFileSystemPath+file)
-        except:
-          None
-      except:
-        None
+      os.close(_gLockFd)
     except:
       None
+    _gLockFd = None
 
 #################################################################################
 #################################################################################
@@ -1210,41 +1299,47 @@ def _bindSocket(address_):
   global _gLockFileExtension
   global _gFileSystemPath
   global _MAX_BIND_ATTEMPTS
+  # release any lock still held from a previous bind of this server
+  _releaseLockFile()
   if _gServerType == UNIX:
     # Unix domain socket
     _gLockFile = _gUnixSourceAddress+"-unix"+_gLockFileExtension
     for attempt in range(1,_MAX_BIND_ATTEMPTS+1):
       try:
-        _gLockFd = open((_gLockFile), "w+")
-        fcntl.flock(_gLockFd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        _gLockFd = _acquireLockFile(_gLockFile)
         _gSocketFd.bind((_gUnixSourceAddress))
         if attempt > 1:
           _gServerName = _gServerName + str(attempt-1)
         return
       except Exception as error:
+        # don't keep holding the lock for a name we could not bind to
+        _releaseLockFile()
         if attempt == 1:
           # only print message on first attemps
-          _printWarning("Could not bind to UNIX address: {}, looking for first available address".format(_gServerName))
+          _printWarning("Could not bind to UNIX address: %s, looking for first available address", _gServerName)
         _gUnixSourceAddress = address_ + str(attempt)
         _gLockFile = _gUnixSourceAddress+"-unix"+_gLockFileExtension
-    _printError("Could not find available address after {} attempts".format(_MAX_BIND_ATTEMPTS))
+    _printError("Could not find available address after %d attempts", _MAX_BIND_ATTEMPTS)
   else:
-    # IP domain socket
+    # IP domain socket, only the port changes between attempts, so build
+    # the invariant part of the lockfile name once up front
+    lockFilePrefix = "%s%s-%s-%s-" % (_gFileSystemPath, _gServerName, _gServerType, _gHostnameOrIpAddr)
     port = _gPort
     for attempt in range(1,_MAX_BIND_ATTEMPTS+1):
       try:
         _gSocketFd.bind((address_, port))
-        _gLockFile = _gFileSystemPath + _gServerName + "-" + _gServerType + "-" + _gHostnameOrIpAddr + "-" + str(port) + _gLockFileExtension
-        _gLockFd = open((_gLockFile), "w+")
-        fcntl.flock(_gLockFd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        _gLockFile = "%s%d%s" % (lockFilePrefix, port, _gLockFileExtension)
+        _gLockFd = _acquireLockFile(_gLockFile)
+        _gPort = port
         return
       except Exception as error:
         if attempt == 1:
           # only print message on first attemps
-          _printWarning("Could not bind to requested port: {}, looking for first available port".format(_gPort))
+          _printWarning("Could not bind to requested port: %s, looking for first available port", _gPort)
+        # step through the ports one at a time from the requested one, the
+        # global is only updated once we have actually bound to a port
         port = _gPort + attempt
-        _gPort = port
-    _printError("Could not find available port after {} attempts".format(_MAX_BIND_ATTEMPTS))
+    _printError("Could not find available port after %d attempts", _MAX_BIND_ATTEMPTS)
   raise Exception(error)
 
 #################################################################################
@@ -1296,7 +1391,7 @@ def _createSocket():
       _bindSocket(_gUnixSourceAddress)
     return (True)
   except Exception as error:
-    _printError("{}".format(error))
+    _printError("%s", error)
     return (False)
 
 #################################################################################
@@ -1319,22 +1414,22 @@ def _runUDPServer():
   global _gHostnameOrIpAddr
   global _gPort
   if (_createSocket()):
-    _printInfo("UDP Server: %s Started On Host: %s, Port: %d" %
-          (_gServerName, _gHostnameOrIpAddr, _gPort))
+    _printInfo("UDP Server: %s Started On Host: %s, Port: %d",
+          _gServerName, _gHostnameOrIpAddr, _gPort)
     _runDGRAMServer()
   else:
-    _printError("Cannot create socket for UDP Server: %s On Host: %s, Port: %d" %
-          (_gServerName, _gHostnameOrIpAddr, _gPort))
+    _printError("Cannot create socket for UDP Server: %s On Host: %s, Port: %d",
+          _gServerName, _gHostnameOrIpAddr, _gPort)
 
 #################################################################################
 #################################################################################
 def _runUNIXServer():
   global _gServerName
   if (_createSocket()):
-    _printInfo("UNIX Server: %s Started" % _gServerName)
+    _printInfo("UNIX Server: %s Started", _gServerName)
     _runDGRAMServer()
   else:
-    _printError("Cannot create socket for UNIX Server: %s" % _gServerName)
+    _printError("Cannot create socket for UNIX Server: %s", _gServerName)
 
 #################################################################################
 #################################################################################
@@ -1354,7 +1449,7 @@ def _acceptConnection():
     _gTcpConnectSockName = clientAddr[0]
     return (True)
   except Exception as error:
-    _printError("{}".format(error))
+    _printError("%s", error)
     return (False)
 
 #################################################################################
@@ -1379,17 +1474,17 @@ def _runTCPServer():
     socketCreated = _createSocket()
     if socketCreated:
       if initialStartup:
-        _printInfo("TCP Server: %s Started On Host: %s, Port: %d" %
-              (_gServerName, _gHostnameOrIpAddr, _gPort))
+        _printInfo("TCP Server: %s Started On Host: %s, Port: %d",
+              _gServerName, _gHostnameOrIpAddr, _gPort)
         _addNativeCommands()
         initialStartup = False
       connectionAccepted = _acceptConnection()
       if connectionAccepted:
         # shutdown original socket to not allow any new connections
         # until we are done with this one
-        _gTcpPrompt = _gServerName + "[" + _gTcpConnectSockName + ":" + str(_gPort) + "]:" + _gPrompt
-        _gTcpTitle = _gTitle + ": " + _gServerName + "[" + \
-                     _gTcpConnectSockName + ":" + str(_gPort) + "], Mode: INTERACTIVE"
+        tcpServer = "%s[%s:%d]" % (_gServerName, _gTcpConnectSockName, _gPort)
+        _gTcpPrompt = "%s:%s" % (tcpServer, _gPrompt)
+        _gTcpTitle = "%s: %s, Mode: INTERACTIVE" % (_gTitle, tcpServer)
         PshellReadline.setFileDescriptors(_gConnectFd,
                                           _gConnectFd,
                                           PshellReadline.SOCKET,
@@ -1403,8 +1498,8 @@ def _runTCPServer():
         _gConnectFd.close()
         _gSocketFd.close()
   if not socketCreated or not connectionAccepted:
-    _printError("Cannot create socket for TCP Server: %s On Host: %s, Port: %d" %
-          (_gServerName, _gHostnameOrIpAddr, _gPort))
+    _printError("Cannot create socket for TCP Server: %s On Host: %s, Port: %d",
+          _gServerName, _gHostnameOrIpAddr, _gPort)
 
 #################################################################################
 #################################################################################
@@ -1412,10 +1507,11 @@ def _runLocalServer():
   global _gPrompt
   global _gTitle
   global _gQuitLocal
-  _gPrompt = _getDisplayServerName() + "[" + \
-             _getDisplayServerType() + "]:" + _getDisplayPrompt()
-  _gTitle = _getDisplayTitle() + ": " + _getDisplayServerName() + \
-            "[" + _getDisplayServerType() + "], Mode: INTERACTIVE"
+  serverName = _getDisplayServerName()
+  serverType = _getDisplayServerType()
+  _gPrompt = serverName + "[" + serverType + "]:" + _getDisplayPrompt()
+  _gTitle = _getDisplayTitle() + ": " + serverName + \
+            "[" + serverType + "], Mode: INTERACTIVE"
   _addNativeCommands()
   _showWelcome()
   _gQuitLocal = False
@@ -1521,9 +1617,14 @@ def _addTabCompletions():
   global _gCommandList
   global _gServerType
   global _gRunning
+  global _gTabCompletionsAdded
   if (((_gServerType == LOCAL) or (_gServerType == TCP)) and (_gRunning  == True)):
-    for command in _gCommandList:
-      PshellReadline.addTabCompletion(command["name"])
+    # one time catch-up for all the commands added before the server started,
+    # any command added after this is registered directly by _addCommand
+    if (_gTabCompletionsAdded == False):
+      for command in _gCommandList:
+        PshellReadline.addTabCompletion(command["name"])
+      _gTabCompletionsAdded = True
 
 #################################################################################
 #################################################################################
@@ -1531,10 +1632,11 @@ def _receiveDGRAM():
   global _gPshellMsg
   global _gSocketFd
   global _gPshellMsgPayloadLength
-  global _gPshellMsgHeaderFormat
+  global _gPshellMsgHeader
+  global _gPshellMsgHeaderSize
   global _gFromAddr
-  (_gPshellMsg, _gFromAddr) = _gSocketFd.recvfrom(_gPshellMsgPayloadLength)
-  _gPshellMsg = _PshellMsg._asdict(_PshellMsg._make(struct.unpack(_gPshellMsgHeaderFormat+str(len(_gPshellMsg)-struct.calcsize(_gPshellMsgHeaderFormat))+"s", _gPshellMsg)))
+  (message, _gFromAddr) = _gSocketFd.recvfrom(_gPshellMsgPayloadLength)
+  _gPshellMsg = _PshellMsg._asdict(_PshellMsg._make(_gPshellMsgHeader.unpack_from(message) + (message[_gPshellMsgHeaderSize:],)))
   _processCommand(_gPshellMsg["payload"])
 
 #################################################################################
@@ -1556,11 +1658,9 @@ def _receiveTCP():
 #################################################################################
 #################################################################################
 def _processCommand(command_):
-  global _gCommandList
   global _gMaxLength
   global _gCommandHelp
   global _gListHelp
-  global _gMsgTypes
   global _gPshellMsg
   global _gServerType
   global _gArgs
@@ -1570,55 +1670,37 @@ def _processCommand(command_):
   global _gPshellClient
   global _gClientTimeoutOverride
   global _gPshellClientTimeout
+  global _gQueryHandlers
+  global _gMsgTypeCommandComplete
 
-  _gPshellMsg["payload"] = ""
-  if (_gPshellMsg["msgType"] == _gMsgTypes["queryVersion"]):
-    _processQueryVersion()
-  elif (_gPshellMsg["msgType"] == _gMsgTypes["queryPayloadSize"]):
-    _processQueryPayloadSize()
-  elif (_gPshellMsg["msgType"] == _gMsgTypes["queryName"]):
-    _processQueryName()
-  elif (_gPshellMsg["msgType"] == _gMsgTypes["queryTitle"]):
-    _processQueryTitle()
-  elif (_gPshellMsg["msgType"] == _gMsgTypes["queryBanner"]):
-    _processQueryBanner()
-  elif (_gPshellMsg["msgType"] == _gMsgTypes["queryPrompt"]):
-    _processQueryPrompt()
-  elif (_gPshellMsg["msgType"] == _gMsgTypes["queryCommands1"]):
-    _processQueryCommands1()
-  elif (_gPshellMsg["msgType"] == _gMsgTypes["queryCommands2"]):
-    _processQueryCommands2()
+  _clearPayload()
+  queryHandler = _gQueryHandlers[_gPshellMsg["msgType"]]
+  if (queryHandler != None):
+    queryHandler()
   else:
     _gCommandDispatched = True
     _gClientTimeoutOverride = None
-    if _gPshellClient and "-t" in command_.split()[0]:
-      _gClientTimeoutOverride = command_.split()[0]
-      command_ = ' '.join(command_.split()[1:])
-      if len(command_) == 0:
+    tokens = command_.split()
+    if _gPshellClient and "-t" in tokens[0]:
+      _gClientTimeoutOverride = tokens[0]
+      tokens = tokens[1:]
+      if len(tokens) == 0:
         if len(_gClientTimeoutOverride) > 2:
           _gPshellClientTimeout = int(_gClientTimeoutOverride[2:])
           printf("PSHELL_INFO: Setting server response timeout to: %d seconds" % _gPshellClientTimeout)
         else:
           printf("PSHELL_INFO: Current server response timeout: %d seconds" % _gPshellClientTimeout)
         return
-    _gArgs = command_.split()[_gFirstArgPos:]
-    command_ = command_.split()[0]
-    numMatches = 0
+    _gArgs = tokens[_gFirstArgPos:]
+    command_ = tokens[0]
     if ((command_ == "?") or (command_ == "help")):
       _help(_gArgs)
       _gCommandDispatched = False
       return
     else:
-      length = len(command_)
-      for command in _gCommandList:
-        # do an initial substring match for command abbreviation support
-        if (isSubString(command_, command["name"], len(command_))):
-          _gFoundCommand = command
-          numMatches += 1
-          # if we have an exact match, take it and break out
-          if _gFoundCommand["length"] == length:
-            numMatches = 1
-            break
+      (numMatches, command) = _findCommand(command_)
+      if (numMatches > 0):
+        _gFoundCommand = command
     if (numMatches == 0):
       printf("PSHELL_ERROR: Command: '%s' not found" % command_)
     elif (numMatches > 1):
@@ -1634,70 +1716,98 @@ def _processCommand(command_):
       else:
         _gFoundCommand["function"](_gArgs)
   _gCommandDispatched = False
-  _gPshellMsg["msgType"] = _gMsgTypes["commandComplete"]
+  _gPshellMsg["msgType"] = _gMsgTypeCommandComplete
   _reply()
 
+#################################################################################
+#################################################################################
+def _findCommand(command_):
+  global _gCommandDict
+  # an exact name match always wins, even if that name is also the prefix of
+  # other commands, otherwise look it up as an abbreviation, which only depends
+  # on the length of the abbreviation, not the number of commands
+  if (command_ in _gCommandDict):
+    return (1, _gCommandDict[command_])
+  else:
+    return (_findCommandAbbreviation(command_))
+
+#################################################################################
+#################################################################################
+def _findCommandAbbreviation(abbreviation_):
+  global _gCommandTrie
+  node = _gCommandTrie
+  for char in abbreviation_:
+    if (char not in node["children"]):
+      return (0, None)
+    node = node["children"][char]
+  return (node["numCommands"], node["command"])
+
 #################################################################################
 #################################################################################
 def _isValidArgCount():
   global _gArgs
   global _gFoundCommand
-  return ((len(_gArgs) >= _gFoundCommand["minArgs"]) and
-          (len(_gArgs) <= _gFoundCommand["maxArgs"]))
+  return (_gFoundCommand["minArgs"] <= len(_gArgs) <= _gFoundCommand["maxArgs"])
 
 #################################################################################
 #################################################################################
 def _processQueryVersion():
   global _gServerVersion
-  printf(_gServerVersion, newline=False)
+  global _gPshellMsg
+  _gPshellMsg["payload"] = _gServerVersion
 
 #################################################################################
 #################################################################################
 def _processQueryPayloadSize():
   global _gPshellMsgPayloadLength
-  printf(str(_gPshellMsgPayloadLength), newline=False)
+  global _gPshellMsg
+  _gPshellMsg["payload"] = str(_gPshellMsgPayloadLength)
 
 #################################################################################
 #################################################################################
 def _processQueryName():
   global _gServerName
-  printf(_gServerName, newline=False)
+  global _gPshellMsg
+  _gPshellMsg["payload"] = _gServerName
 
 #################################################################################
 #################################################################################
 def _processQueryTitle():
   global _gTitle
-  printf(_gTitle, newline=False)
+  global _gPshellMsg
+  _gPshellMsg["payload"] = _gTitle
 
 #################################################################################
 #################################################################################
 def _processQueryBanner():
   global _gBanner
-  printf(_gBanner, newline=False)
+  global _gPshellMsg
+  _gPshellMsg["payload"] = _gBanner
 
 #################################################################################
 #################################################################################
 def _processQueryPrompt():
   global _gPrompt
-  printf(_gPrompt, newline=False)
+  global _gPshellMsg
+  _gPshellMsg["payload"] = _gPrompt
 
 #################################################################################
 #################################################################################
 def _processQueryCommands1():
   global _gCommandList
-  global _gMaxLength
-  global _gPshellMsg
-  _gPshellMsg["payload"] = ""
-  for command in _gCommandList:
-    printf("%-*s  -  %s" % (_gMaxLength, command["name"], command["description"]))
-  printf()
+  global _gCommandRowFormat
+  _clearPayload()
+  # build the whole list and output it with a single printf, rather than one
+  # printf (and one payload append or socket write) per command
+  rowFormat = _gCommandRowFormat
+  printf("".join([rowFormat % (command["name"], command["description"])
+                  for command in _gCommandList]))
 
 #################################################################################
 #################################################################################
 def _processQueryCommands2():
   global _gCommandList
-  for command in _gCommandList:
-    printf("%s%s" % (command["name"], "/"), newline=False)
+  printf("".join([command["name"] + "/" for command in _gCommandList]), newline=False)
 
 #################################################################################
 #################################################################################
@@ -1717,27 +1827,27 @@ def _batch(command_):
   if batchFile == "?" or batchFile == "-h":
     _showUsage()
     return
-  elif (os.path.isfile(batchFile1)):
-    file = open(batchFile1, 'r')
-  elif (os.path.isfile(batchFile2)):
-    file = open(batchFile2, 'r')
-  elif (os.path.isfile(batchFile3)):
-    file = open(batchFile3, 'r')
-  elif (os.path.isfile(batchFile4)):
-    file = open(batchFile4, 'r')
-  elif ((_gFirstArgPos == 0) and (batchFile in "batch")):
-    _showUsage()
-    return
-  else:
-    printf("ERROR: Could not find batch file: '%s'" % batchFile)
+  file = PshellCommon._openFirstFile([batchFile1, batchFile2, batchFile3, batchFile4])
+  if (file == None):
+    if ((_gFirstArgPos == 0) and (batchFile in "batch")):
+      _showUsage()
+    else:
+      printf("ERROR: Could not find batch file: '%s'" % batchFile)
     return
-  # found a batch file, process it
-  for line in file:
-    # skip comments
-    line = line.strip()
-    if ((len(line) > 0) and (line[0] != "#")):
-      _processCommand(line)
+  # found a batch file, read all the commands in one pass and close it
+  # before dispatching any of them
+  commands = _readLines(file)
   file.close()
+  for command in commands:
+    _processCommand(command)
+
+#################################################################################
+#################################################################################
+def _readLines(file_):
+  # return the stripped lines of a batch, startup, or config file, skipping
+  # blank lines and comments, a comment may be indented
+  lines = [line.strip() for line in file_]
+  return ([line for line in lines if ((len(line) > 0) and not line.startswith("#"))])
 
 #################################################################################
 #################################################################################
@@ -1782,20 +1892,21 @@ def _showWelcome():
   global _gPort
   # show our welcome screen
   banner = "#  %s" % _getDisplayBanner()
+  # resolve the display name and type once, they are used by several of
+  # the lines below and each lookup strips a fresh copy of the string
+  serverName = _getDisplayServerName()
+  serverType = _getDisplayServerType()
   if (_gPshellClient == True):
     # put up our window title banner
     printf("\033]0;" + _gTitle + "\007", newline=False)
-    if (_getDisplayServerType() == UNIX):
-      server = "#  Multi-session UNIX server: %s[%s]" % (_getDisplayServerName(),
-                                                         _getDisplayServerType())
+    if (serverType == UNIX):
+      server = "#  Multi-session UNIX server: %s[%s]" % (serverName, serverType)
     else:
-      server = "#  Multi-session UDP server: %s[%s]" % (_getDisplayServerName(),
-                                                        _getDisplayServerType())
+      server = "#  Multi-session UDP server: %s[%s]" % (serverName, serverType)
   elif (_gServerType == LOCAL):
     # put up our window title banner
     printf("\033]0;" + _gTitle + "\007", newline=False)
-    server = "#  Single session LOCAL server: %s[%s]" % (_getDisplayServerName(),
-                                                         _getDisplayServerType())
+    server = "#  Single session LOCAL server: %s[%s]" % (serverName, serverType)
   else:
     # put up our window title banner
     printf("\033]0;" + _gTcpTitle + "\007", newline=False)
@@ -1803,61 +1914,70 @@ def _showWelcome():
                                                           _gTcpConnectSockName,
                                                           _gPort)
   maxBorderWidth = max(58, len(banner),len(server))+2
-  printf()
-  printf("#"*maxBorderWidth)
-  printf("#")
-  printf(banner)
-  printf("#")
-  printf(server)
-  printf("#")
+  # collect the whole screen and output it with a single printf rather than
+  # one write per line
+  lines = []
+  lines.append("")
+  lines.append("#"*maxBorderWidth)
+  lines.append("#")
+  lines.append(banner)
+  lines.append("#")
+  lines.append(server)
+  lines.append("#")
   if (_gServerType == LOCAL):
-    printf("#  Idle session timeout: NONE")
+    lines.append("#  Idle session timeout: NONE")
   else:
-    printf("#  Idle session timeout: %d minutes" % _gTcpTimeout)
-  printf("#")
+    lines.append("#  Idle session timeout: %d minutes" % _gTcpTimeout)
+  lines.append("#")
   if (_gPshellClient == True):
     if _gPshellClientTimeout > 0:
-      printf("#  Command response timeout: {} seconds".format(_gPshellClientTimeout))
+      lines.append("#  Command response timeout: {} seconds".format(_gPshellClientTimeout))
     else:
-      printf("#  Command response timeout: NONE")
-      printf("#")
-      printf("#  WARNING: Interactive client started with no command")
-      printf("#           response timeout.  All commands will be")
-      printf("#           sent as 'fire-and-forget', no results will")
-      printf("#           be extracted or displayed")
-    printf("#")
-    printf("#  The default response timeout can be changed on a")
-    printf("#  per-command basis by preceeding the command with")
-    printf("#  option -t<timeout> (use -t0 for no response)")
-    printf("#")
-    printf("#  e.g. -t10 command")
-    printf("#")
-    printf("#  The default timeout for all commands can be changed")
-    printf("#  by using the -t<timeout> option with no command, to")
-    printf("#  display the current default timeout, just use -t")
-    printf("#")
-  printf("#  Type '?' or 'help' at prompt for command summary")
-  printf("#  Type '?' or '-h' after command for command usage")
-  printf("#")
-  printf("#  Full <TAB> completion, command history, command")
-  printf("#  line editing, and command abbreviation supported")
-  printf("#")
-  printf("#"*maxBorderWidth+"")
-  printf()
+      lines.append("#  Command response timeout: NONE")
+      lines.append("#")
+      lines.append("#  WARNING: Interactive client started with no command")
+      lines.append("#           response timeout.  All commands will be")
+      lines.append("#           sent as 'fire-and-forget', no results will")
+      lines.append("#           be extracted or displayed")
+    lines.append("#")
+    lines.append("#  The default response timeout can be changed on a")
+    lines.append("#  per-command basis by preceeding the command with")
+    lines.append("#  option -t<timeout> (use -t0 for no response)")
+    lines.append("#")
+    lines.append("#  e.g. -t10 command")
+    lines.append("#")
+    lines.append("#  The default timeout for all commands can be changed")
+    lines.append("#  by using the -t<timeout> option with no command, to")
+    lines.append("#  display the current default timeout, just use -t")
+    lines.append("#")
+  lines.append("#  Type '?' or 'help' at prompt for command summary")
+  lines.append("#  Type '?' or '-h' after command for command usage")
+  lines.append("#")
+  lines.append("#  Full <TAB> completion, command history, command")
+  lines.append("#  line editing, and command abbreviation supported")
+  lines.append("#")
+  lines.append("#"*maxBorderWidth)
+  lines.append("")
+  printf("\n".join(lines))
 
 #################################################################################
 #################################################################################
 def _printf(message_, newline_):
   global _gServerType
-  global _gPshellMsg
   global _gCommandInteractive
+  global _gPayloadChunks
+  global _gPayloadChunksLength
   if (_gCommandInteractive == True):
+    # convert the message and look up the server type only once per call
+    message = str(message_)
     if (newline_ == True):
-      message_ = str(message_)+"\n"
-    if ((_gServerType == LOCAL) or (_gServerType == TCP)):
-      PshellReadline.writeOutput(str(message_))
+      message += "\n"
+    serverType = _gServerType
+    if ((serverType == LOCAL) or (serverType == TCP)):
+      PshellReadline.writeOutput(message)
     else:   # UDP/UNIX server
-      _gPshellMsg["payload"] += str(message_)
+      _gPayloadChunks.append(message)
+      _gPayloadChunksLength += len(message)
 
 #################################################################################
 #################################################################################
@@ -1899,21 +2019,36 @@ def _reply():
   global _gSocketFd
   global _gPshellMsg
   global _gServerType
-  global _gPshellMsgHeaderFormat
+  global _gPshellMsgHeader
+  global _gPayloadChunks
+  global _gPayloadChunksLength
   # only issue a reply for a 'datagram' oriented remote server, TCP
   # uses a character stream and is not message based and LOCAL uses
   # no client app
-  if ((_gServerType == UDP) or (_gServerType == UNIX)):
+  serverType = _gServerType
+  if ((serverType == UDP) or (serverType == UNIX)):
+    # the message is read several times below, look it up only once
+    message = _gPshellMsg
+    if (len(_gPayloadChunks) > 0):
+      # join all the accumulated printf output onto the payload in one go
+      message["payload"] += "".join(_gPayloadChunks)
+      del _gPayloadChunks[:]
+      _gPayloadChunksLength = 0
     try:
-      _gSocketFd.sendto(struct.pack(_gPshellMsgHeaderFormat+str(len(_gPshellMsg["payload"]))+"s", *_gPshellMsg.values()), _gFromAddr)
+      _gSocketFd.sendto(_gPshellMsgHeader.pack(message["msgType"],
+                                               message["respNeeded"],
+                                               message["dataNeeded"],
+                                               message["pad"],
+                                               message["seqNum"]) + message["payload"], _gFromAddr)
     except Exception as error:
-      _printError("{}".format(error))
+      _printError("%s", error)
 
 #################################################################################
 #################################################################################
 def _cleanupResources():
   global _gUnixSourceAddress
   global _gLockFile
+  global _gLockFd
   global _gSocketFd
   if (_gUnixSourceAddress != None):
     try:
@@ -1924,6 +2059,7 @@ def _cleanupResources():
     os.unlink(_gLockFile)
   except:
     None
+  _releaseLockFile()
   _cleanupFileSystemResources()
   if (_gSocketFd != None):
     try:
@@ -1948,42 +2084,36 @@ def _loadConfigFile():
     configFile1 = configPath+"/"+_PSHELL_CONFIG_FILE
   configFile2 = _PSHELL_CONFIG_DIR+"/"+_PSHELL_CONFIG_FILE
   configFile3 = os.getcwd()+"/"+_PSHELL_CONFIG_FILE
-  if (os.path.isfile(configFile1)):
-    file = open(configFile1, 'r')
-  elif (os.path.isfile(configFile2)):
-    file = open(configFile2, 'r')
-  elif (os.path.isfile(configFile3)):
-    file = open(configFile3, 'r')
-  else:
+  file = PshellCommon._openFirstFile([configFile1, configFile2, configFile3])
+  if (file == None):
     return
   # found a config file, process it
-  for line in file:
-    # skip comments
-    if (line[0] != "#"):
-      value = line.strip().split("=");
-      if (len(value) == 2):
-        option = value[0].split(".")
-        value[1] = value[1].strip()
-        if ((len(option) == 2) and  (_gServerName == option[0])):
-          if (option[1].lower() == "title"):
-            _gTitle = value[1]
-          elif (option[1].lower() == "banner"):
-            _gBanner = value[1]
-          elif (option[1].lower() == "prompt"):
-            _gPrompt = value[1]+" "
-          elif (option[1].lower() == "host"):
-            _gHostnameOrIpAddr = value[1].lower()
-          elif ((option[1].lower() == "port") and (value[1].isdigit())):
-            _gPort = int(value[1])
-          elif (option[1].lower() == "type"):
-            if ((value[1].lower() == UDP) or
-                (value[1].lower() == TCP) or
-                (value[1].lower() == UNIX) or
-                (value[1].lower() == LOCAL)):
-              _gServerType = value[1].lower()
-          elif ((option[1].lower() == "timeout") and (value[1].isdigit())):
-            _gTcpTimeout = int(value[1])
+  lines = _readLines(file)
   file.close()
+  for line in lines:
+    value = line.split("=");
+    if (len(value) == 2):
+      option = value[0].split(".")
+      value[1] = value[1].strip()
+      if ((len(option) == 2) and  (_gServerName == option[0])):
+        # lowercase the option name once rather than once per comparison
+        key = option[1].lower()
+        if (key == "title"):
+          _gTitle = value[1]
+        elif (key == "banner"):
+          _gBanner = value[1]
+        elif (key == "prompt"):
+          _gPrompt = value[1]+" "
+        elif (key == "host"):
+          _gHostnameOrIpAddr = value[1].lower()
+        elif ((key == "port") and (value[1].isdigit())):
+          _gPort = int(value[1])
+        elif (key == "type"):
+          serverType = value[1].lower()
+          if (serverType in (UDP, TCP, UNIX, LOCAL)):
+            _gServerType = serverType
+        elif ((key == "timeout") and (value[1].isdigit())):
+          _gTcpTimeout = int(value[1])
   return
 
 #################################################################################
@@ -1996,26 +2126,18 @@ def _loadStartupFile():
     startupFile1 = startupPath+"/"+_gServerName+".startup"
   startupFile2 = _PSHELL_STARTUP_DIR+"/"+_gServerName+".startup"
   startupFile3 = os.getcwd()+"/"+_gServerName+".startup"
-  if (os.path.isfile(startupFile1)):
-    file = open(startupFile1, 'r')
-  elif (os.path.isfile(startupFile2)):
-    file = open(startupFile2, 'r')
-  elif (os.path.isfile(startupFile3)):
-    file = open(startupFile3, 'r')
-  else:
+  file = PshellCommon._openFirstFile([startupFile1, startupFile2, startupFile3])
+  if (file == None):
     return
-  # found a config file, process it
-  for line in file:
-    # skip comments
-    line = line.strip()
-    if ((len(line) > 0) and (line[0] != "#")):
-      _runCommand(line)
+  # found a startup file, process it
+  lines = _readLines(file)
   file.close()
+  for line in lines:
+    _runCommand(line)
 
 #################################################################################
 #################################################################################
 def _runCommand(command_):
-  global _gCommandList
   global _gCommandInteractive
   global _gCommandDispatched
   global _gFoundCommand
@@ -2024,13 +2146,12 @@ def _runCommand(command_):
   if (_gCommandDispatched == False):
     _gCommandDispatched = True
     _gCommandInteractive = False
-    numMatches = 0
-    _gArgs = command_.split()[_gFirstArgPos:]
-    command_ = command_.split()[0]
-    for command in _gCommandList:
-      if (command_ in command["name"]):
-        _gFoundCommand = command
-        numMatches += 1
+    tokens = command_.split()
+    _gArgs = tokens[_gFirstArgPos:]
+    # same exact/abbreviation lookup as an interactive command
+    (numMatches, command) = _findCommand(tokens[0])
+    if (numMatches > 0):
+      _gFoundCommand = command
     if ((numMatches == 1) and _isValidArgCount() and not isHelp()):
       _gFoundCommand["function"](_gArgs)
     _gCommandDispatched = False
@@ -2046,13 +2167,26 @@ def _wheel(string_):
     _printf("\r%s%c" % (string_, _gWheel[(_gWheelPos)%4]), newline_=False)
   else:
     _printf("\r%c" % _gWheel[(_gWheelPos)%4], newline_=False)
-  _flush()
+  _keepAlive()
 
 #################################################################################
 #################################################################################
 def _march(string_):
   _printf(string_, newline_=False)
-  _flush()
+  _keepAlive()
+
+#################################################################################
+#################################################################################
+def _keepAlive():
+  global _gLastKeepAlive
+  global _gKeepAliveInterval
+  global _gKeepAliveMaxBatch
+  global _gPayloadChunksLength
+  now = time.time()
+  if (((now - _gLastKeepAlive) >= _gKeepAliveInterval) or
+      (_gPayloadChunksLength >= _gKeepAliveMaxBatch)):
+    _gLastKeepAlive = now
+    _flush()
 
 #################################################################################
 #################################################################################
@@ -2060,12 +2194,22 @@ def _flush():
   global _gCommandInteractive
   global _gServerType
   global _gPshellMsg
-  global _gMsgTypes
+  global _gMsgTypeControlCommand
   if ((_gCommandInteractive == True) and
-      (_gPshellMsg["msgType"] != _gMsgTypes["controlCommand"]) and
+      (_gPshellMsg["msgType"] != _gMsgTypeControlCommand) and
       ((_gServerType == UDP) or (_gServerType == UNIX))):
     _reply()
-    _gPshellMsg["payload"] = ""
+    _clearPayload()
+
+#################################################################################
+#################################################################################
+def _clearPayload():
+  global _gPshellMsg
+  global _gPayloadChunks
+  global _gPayloadChunksLength
+  _gPshellMsg["payload"] = ""
+  del _gPayloadChunks[:]
+  _gPayloadChunksLength = 0
 
 #################################################################################
 #################################################################################
@@ -2081,21 +2225,24 @@ def _setLogFunction(function_):
 
 #################################################################################
 #################################################################################
-def _printError(message_):
+def _printError(message_, *args_):
+  # any arguments are only formatted into the message if it is actually logged
   if _gLogLevel >= LOG_LEVEL_ERROR:
-    _printLog("PSHELL_ERROR: {}".format(message_))
+    _printLog("PSHELL_ERROR: {}".format(message_ % args_ if args_ else message_))
 
 #################################################################################
 #################################################################################
-def _printWarning(message_):
+def _printWarning(message_, *args_):
+  # any arguments are only formatted into the message if it is actually logged
   if _gLogLevel >= LOG_LEVEL_WARNING:
-    _printLog("PSHELL_WARNING: {}".format(message_))
+    _printLog("PSHELL_WARNING: {}".format(message_ % args_ if args_ else message_))
 
 #################################################################################
 #################################################################################
-def _printInfo(message_):
+def _printInfo(message_, *args_):
+  # any arguments are only formatted into the message if it is actually logged
   if _gLogLevel >= LOG_LEVEL_INFO:
-    _printLog("PSHELL_INFO: {}".format(message_))
+    _printLog("PSHELL_INFO: {}".format(message_ % args_ if args_ else message_))
 
 #################################################################################
 #################################################################################
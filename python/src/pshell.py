@@ -97,21 +97,19 @@ Usage: pshell -s | -n | {{{<hostName | ipAddr>} {<portNum> | <udpServerName>}} |
 
 # import all our necessary module
 import os
-import fnmatch
-import fcntl
 import sys
 import signal
 import time
 import PshellControl
 import PshellServer
 import PshellReadline
+import PshellCommon
 
 _gControlName = "pshellClient"
 _gHelp = ('?', '-h', '--h', '-help', '--help', 'help')
 
 _gFileSystemPath = "/tmp/.pshell/"
 _gLockFileExtension = ".lock"
-_gUnixLockFileId = "unix"+_gLockFileExtension
 _gActiveServers = []
 
 #################################################################################
@@ -282,15 +280,8 @@ def _processBatchFile():
   batchFile2 = _gDefaultBatchDir+"/"+_gFilename
   batchFile3 = os.getcwd()+"/"+_gFilename
   batchFile4 = _gFilename
-  if (os.path.isfile(batchFile1)):
-    file = open(batchFile1, 'r')
-  elif (os.path.isfile(batchFile2)):
-    file = open(batchFile2, 'r')
-  elif (os.path.isfile(batchFile3)):
-    file = open(batchFile3, 'r')
-  elif (os.path.isfile(batchFile4)):
-    file = open(batchFile4, 'r')
-  else:
+  file = PshellCommon._openFirstFile([batchFile1, batchFile2, batchFile3, batchFile4])
+  if (file == None):
     print("PSHELL_ERROR: Could not open file: '%s'" % _gFilename)
     return
   # we found a batch file, process it
@@ -390,7 +381,7 @@ def _getNamedServer(arg):
       numFound = 1
       foundIndex = index
       break
-    elif arg == server["server"][:len(arg)]:
+    elif server["server"].startswith(arg):
       numFound += 1
       foundIndex = index
   if numFound == 1:
@@ -421,15 +412,8 @@ def _loadServers():
   configFile2 = _gDefaultConfigDir+"/"+_gClientConfigFile
   configFile3 = os.getcwd()+"/"+_gClientConfigFile
   configFile4 = _gClientConfigFile
-  if (os.path.isfile(configFile1)):
-    file = open(configFile1, 'r')
-  elif (os.path.isfile(configFile2)):
-    file = open(configFile2, 'r')
-  elif (os.path.isfile(configFile3)):
-    file = open(configFile3, 'r')
-  elif (os.path.isfile(configFile4)):
-    file = open(configFile4, 'r')
-  else:
+  file = PshellCommon._openFirstFile([configFile1, configFile2, configFile3, configFile4])
+  if (file == None):
     return
   # opened config file, process it
   for line in file:
@@ -453,42 +437,17 @@ def _cleanupFileSystemResources():
   global _gActiveServers
   global _gMaxHostnameLength
   global _gMaxActiveServerLength
-  global _gUnixLockFileId
-  if not os.path.isdir(_gFileSystemPath):
-    os.system("mkdir %s" % _gFileSystemPath)
-    os.system("chmod 777 %s" % _gFileSystemPath)
-  lockFiles = fnmatch.filter(os.listdir(_gFileSystemPath), "*"+_gLockFileExtension)
-  lockFiles.sort()
-  for file in lockFiles:
-    try:
-      fd = open(_gFileSystemPath+file, "r")
-      try:
-        fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
-        # we got the lock, delete any socket file and lock file and don't print anything
-        try:
-          # unix temp socket file
-          if _gUnixLockFileId in file:
-            os.unlink(_gFileSystemPath+file.split("-")[0])
-        except:
-          None
-        try:
-          # lockfile
-          os.unlink(_gFileSystemPath+file)
-        except:
-          None
-      except:
-        # file handle is in use and locked by another process, print it
-        if "-control" not in file:
-          server = file.split(".")[0]
-          server = server.split("-")
-          _gMaxActiveServerLength = max(len(server[0]), _gMaxActiveServerLength)
-          if len(server) == 2:
-            _gActiveServers.append({"name":server[0], "type":server[1], "host":"N/A", "port":"N/A"})
-          elif len(server) == 4:
-            _gActiveServers.append({"name":server[0], "type":server[1], "host":server[2], "port":server[3]})
-            _gMaxHostnameLength = max(len(server[2]), _gMaxHostnameLength)
-    except:
-      None
+  # the lockfiles still held belong to running servers and clients, list the servers
+  for file in PshellCommon._cleanupLockFiles(_gFileSystemPath, _gLockFileExtension, PshellServer._getUnixSocketFile):
+    if "-control" not in file:
+      server = file.split(".")[0]
+      server = server.split("-")
+      _gMaxActiveServerLength = max(len(server[0]), _gMaxActiveServerLength)
+      if len(server) == 2:
+        _gActiveServers.append({"name":server[0], "type":server[1], "host":"N/A", "port":"N/A"})
+      elif len(server) == 4:
+        _gActiveServers.append({"name":server[0], "type":server[1], "host":server[2], "port":server[3]})
+        _gMaxHostnameLength = max(len(server[2]), _gMaxHostnameLength)
 
 #####################################################
 #####################################################
@@ -497,13 +456,13 @@ def _getActiveServer(arg):
   global _gRemoteServer
   global _gMaxHostnameLength
   global _gPort
+  # parse the index only once, the converted value is used below
   try:
-    int(arg, 10)
+    index = int(arg, 10)
     isInt = True
-  except:
+  except ValueError:
     isInt = False
   if isInt:
-    index = int(arg)
     if index-1 >= 0 and index-1 < len(_gActiveServers):
       if _gActiveServers[index-1]["type"] == "unix":
         _gRemoteServer = _gActiveServers[index-1]["name"]
@@ -530,15 +489,18 @@ def _getActiveServer(arg):
     # for UNIX servers sinced they are guaranteed to be unique, whereas an IP based server
     # can have the same name running different instances on different ports
     numFound = 0
+    foundServer = None
     for server in _gActiveServers:
       if len(server["name"]) == len(arg) and server["name"] == arg and server["type"] == "unix":
         # exact match found, assumes no duplicates in list
         numFound = 1
+        foundServer = server
         break
-      elif arg == server["name"][:len(arg)] and server["type"] == "unix":
+      elif server["name"].startswith(arg) and server["type"] == "unix":
         numFound += 1
+        foundServer = server
     if numFound == 1:
-      _gRemoteServer = server["name"]
+      _gRemoteServer = foundServer["name"]
       return True
     else:
       return False
@@ -560,6 +522,8 @@ def _showActiveServers():
   if len(_gActiveServers) > 0:
     print("Index   %s   Type   Host%s   Port" % ("Server Name".ljust(_gMaxActiveServerLength), " "*(_gMaxHostnameLength-4)))
     print("=====   %s   ====   %s   =====" % ("="*_gMaxActiveServerLength, "="*_gMaxHostnameLength))
+  # substitute the column widths in once rather than padding every field of every row
+  rowFormat = "%%-5d   %%-%ds   %%-4s   %%-%ds   %%-4s" % (_gMaxActiveServerLength, _gMaxHostnameLength)
   for index, server in enumerate(_gActiveServers):
     if server["type"] == "tcp":
       tcpFound = True
@@ -567,7 +531,7 @@ def _showActiveServers():
       udpFound = True
     if server["type"] == "unix":
       unixFound = True
-    print("%-5d   %s   %-4s   %s   %-4s" % (index+1, server["name"].ljust(_gMaxActiveServerLength), server["type"], server["host"].ljust(_gMaxHostnameLength), server["port"]))
+    print(rowFormat % (index+1, server["name"], server["type"], server["host"], server["port"]))
   if len(_gActiveServers) > 0:
     print("")
     if tcpFound:
@@ -591,8 +555,10 @@ def _showNamedServers():
   print("")
   print("%s  Port Number  Response Timeout" % "Server Name".ljust(_gMaxNamedServerLength))
   print("%s  ===========  ================" % ("="*_gMaxNamedServerLength))
+  # substitute the column width in once rather than padding every field of every row
+  rowFormat = "%%-%ds  %%-11s  %%d seconds" % _gMaxNamedServerLength
   for server in _gServerList:
-    print("%s  %s  %d seconds" % (server["server"].ljust(_gMaxNamedServerLength), server["port"].ljust(11), server["timeout"]))
+    print(rowFormat % (server["server"], server["port"], server["timeout"]))
   print("")
   exit(0)
 